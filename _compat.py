@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+"""
+Optional dependencies. Numba is used to compile the hot loops of the library
+when it is installed; otherwise, the decorated functions run as plain Python.
+pydivsufsort provides a linear-time suffix array construction in C.
+"""
+
+try:
+    from numba import njit, prange
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+    prange = range
+
+try:
+    from pydivsufsort import divsufsort
+except ImportError:
+    divsufsort = None
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 
+from collections import defaultdict
+
 import numpy as np
 
-from .entropy import entropy_kontoyiannis
+from .entropy import (_encode, _pair_codes, _entropy_kontoyiannis_codes,
+                      entropy_kontoyiannis_batch)
 
 
 def sequence_splitting(X, C):
@@ -13,12 +16,13 @@ def sequence_splitting(X, C):
     Reference: https://dl.acm.org/doi/10.1145/3459625
     """
     assert len(X) == len(C), "sequences must have the same size"
-    ents = []
-    w = []
-    for context in set(C):
-        sequence = [str(X[i]) for i in range(len(X)) if C[i] == context]
-        ents.append(entropy_kontoyiannis(sequence))
-        w.append(len(sequence) / len(X))
+    # Split X into one subsequence per context in a single pass
+    subsequences = defaultdict(list)
+    for x, context in zip(X, C):
+        subsequences[context].append(x)
+
+    ents = entropy_kontoyiannis_batch(list(subsequences.values()))
+    w = [len(sequence) / len(X) for sequence in subsequences.values()]
     return np.average(ents, weights=w)
 
 
@@ -30,8 +34,13 @@ def sequence_merging(X, C):
     Reference: https://dl.acm.org/doi/10.1145/3459625
     """    
     assert len(X) == len(C), "sequences must have the same size"
-    XY = [str(X[i]) + str(C[i]) for i in range(len(X))]
-    return entropy_kontoyiannis(XY) - entropy_kontoyiannis(C)
+    # Each pair (X[i], C[i]) is a single integer symbol of the merged sequence.
+    # The pair codes are encoded again so that the alphabet is only the pairs
+    # that occur, not all n_x * n_c of them.
+    c_codes = _encode(C)
+    xc_codes, _ = _pair_codes(_encode(X), c_codes)
+    xc_codes = _encode(xc_codes)
+    return _entropy_kontoyiannis_codes(xc_codes) - _entropy_kontoyiannis_codes(c_codes)
 
 
 def sequence_concatenating(X, C):
@@ -40,4 +49,6 @@ def sequence_concatenating(X, C):
     using the sequence-concatenating strategy.
     """    
     assert len(X) == len(C), "sequences must have the same size"    
-    return entropy_kontoyiannis(C + X) - entropy_kontoyiannis(C)
+    # C and X share one alphabet, so a symbol gets the same code in both
+    codes = _encode(list(C) + list(X))
+    return _entropy_kontoyiannis_codes(codes) - _entropy_kontoyiannis_codes(codes[:len(C)])
@@ -3,6 +3,17 @@
 import math
 import numpy as np
 
+from ._compat import njit, prange
+from .metrics import _encode
+
+
+def _entropy_from_counts(counts):
+    """
+    Computes the Shannon entropy of the distribution given by symbol counts.
+    """
+    probs = counts[counts > 0] / np.sum(counts)
+    return np.sum((-1) * probs * np.log2(probs))
+
 
 def uniform_entropy(sequence):
     """
@@ -39,20 +50,47 @@ def shannon_entropy(sequence):
     n = len(sequence)
     if n == 0:
         return 0.0
-    _, counts = np.unique(sequence, return_counts=True, axis=0)
-    probs = counts / n
-    return np.sum((-1) * probs * np.log2(probs))
+    return _entropy_from_counts(np.bincount(_encode(sequence)))
+
+
+def _pair_codes(x_codes, y_codes):
+    """
+    Encodes each pair (x, y) of two integer-encoded sequences of the same size
+    as the single integer x * n_y + y, where n_y is the number of unique
+    symbols in Y.
+
+    Returns:
+        The code of each pair and n_y.
+    """
+    x_codes = x_codes.astype(np.int64)
+    y_codes = y_codes.astype(np.int64)
+    n_y = int(y_codes.max()) + 1 if len(y_codes) else 1
+    return x_codes * n_y + y_codes, n_y
+
+
+def _pair_counts(X, Y):
+    """
+    Counts the distinct pairs (x, y) of two sequences of the same size, encoded
+    as in _pair_codes.
+
+    Returns:
+        The distinct pair codes, their counts, and n_y.
+    """
+    pairs, n_y = _pair_codes(_encode(X), _encode(Y))
+    # A dense bincount over all pairs could be as large as the product of the
+    # alphabet sizes, so the pair codes are counted by sorting instead
+    pairs, counts = np.unique(pairs, return_counts=True)
+    return pairs, counts, n_y
 
 
 def joint_entropy(X, Y):
     """
     Computes H(X, Y), the joint entropy of X and Y.
     """
-    probs = []
-    for xi in set(X):
-        for yi in set(Y):
-            probs.append(np.mean(np.logical_and(X == xi, Y == yi)))
-    return np.sum(-p * np.log2(p) for p in probs if p > 0)
+    if len(X) == 0:
+        return 0.0
+    _, counts, _ = _pair_counts(X, Y)
+    return _entropy_from_counts(counts)
 
 
 def conditional_entropy(X, Y):
@@ -62,7 +100,243 @@ def conditional_entropy(X, Y):
     Equation:
         $H(X | Y) = H(X, Y) - H(Y)$
     """
-    return joint_entropy(X, Y) - shannon_entropy(Y)
+    if len(X) == 0:
+        return 0.0
+    pairs, counts, n_y = _pair_counts(X, Y)
+    # The counts of Y are the joint counts summed over the values of X
+    y_counts = np.bincount(pairs % n_y, weights=counts)
+    return _entropy_from_counts(counts) - _entropy_from_counts(y_counts)
+
+
+@njit(cache=True)
+def _sam_get(table, trans, sigma, state, symbol):
+    """
+    Returns the target of the transition of the suffix automaton from state on
+    symbol, or -1 if there is none. Transitions are kept in table, with one row
+    per state and one column per symbol, or, when table is None, in trans,
+    keyed by state * sigma + symbol.
+    """
+    if table is not None:
+        return np.int64(table[state, symbol])
+    key = state * sigma + symbol
+    if key in trans:
+        return trans[key]
+    return -1
+
+
+@njit(cache=True)
+def _sam_set(table, trans, sigma, state, symbol, target):
+    """
+    Sets the target of the transition of the suffix automaton from state on
+    symbol, stored as in _sam_get.
+    """
+    if table is not None:
+        table[state, symbol] = target
+    else:
+        trans[state * sigma + symbol] = target
+
+
+@njit(cache=True)
+def _sam_add_transition(table, trans, head, edge_next, edge_symbol, n_edges,
+                        sigma, state, symbol, target):
+    """
+    Adds a transition to the suffix automaton and returns the new number of
+    edges. Without a table, the transitions of each state are also chained in
+    edge_next/edge_symbol, so that they can be copied when the state is cloned.
+    """
+    _sam_set(table, trans, sigma, state, symbol, target)
+    if table is not None:
+        return n_edges
+    edge_symbol[n_edges] = symbol
+    edge_next[n_edges] = head[state]
+    head[state] = n_edges
+    return n_edges + 1
+
+
+@njit(cache=True)
+def _sam_copy_transitions(table, trans, head, edge_next, edge_symbol, n_edges,
+                          sigma, source, target):
+    """
+    Copies the transitions of state source to state target and returns the new
+    number of edges.
+    """
+    if table is not None:
+        table[target] = table[source]
+        return n_edges
+    e = head[source]
+    while e != -1:
+        symbol = edge_symbol[e]
+        n_edges = _sam_add_transition(
+            table, trans, head, edge_next, edge_symbol, n_edges, sigma,
+            target, symbol, _sam_get(table, trans, sigma, source, symbol))
+        e = edge_next[e]
+    return n_edges
+
+
+@njit(cache=True)
+def _match_lengths_automaton(codes, sigma, table):
+    """
+    The suffix automaton behind _match_lengths, for codes in range(sigma).
+
+    Args:
+        codes: the input sequence, encoded as integers.
+        sigma: the number of symbols.
+        table: a (2 * len(codes) + 1, sigma) array filled with -1 to keep the
+            transitions in, or None to keep them in a dict. Following a
+            transition in the table is a single array load instead of a dict
+            lookup.
+    """
+    n = len(codes)
+    lengths = np.zeros(n, dtype=np.int64)
+    max_states = 2 * n + 1
+    max_edges = 4 * n + 4
+    link = np.full(max_states, -1, dtype=np.int64)
+    maxlen = np.zeros(max_states, dtype=np.int64)
+    head = np.full(max_states, -1, dtype=np.int64)
+    edge_next = np.empty(max_edges, dtype=np.int64)
+    edge_symbol = np.empty(max_edges, dtype=np.int64)
+    # The key -1 is never used by a transition; it gives the dict its types
+    trans = {-1: -1}
+    n_states = 1
+    n_edges = 0
+    last = 0
+
+    state = 0
+    length = 0
+    for i in range(n):
+        while i + length < n:
+            symbol = np.int64(codes[i + length])
+            target = _sam_get(table, trans, sigma, state, symbol)
+            if target == -1:
+                break
+            state = target
+            length += 1
+        lengths[i] = length
+
+        # Drop the first symbol of the match
+        if length > 0:
+            length -= 1
+            if length == maxlen[link[state]]:
+                state = link[state]
+
+        # Append codes[i] to the automaton
+        c = np.int64(codes[i])
+        cur = n_states
+        n_states += 1
+        maxlen[cur] = maxlen[last] + 1
+        p = last
+        while p != -1 and _sam_get(table, trans, sigma, p, c) == -1:
+            n_edges = _sam_add_transition(table, trans, head, edge_next,
+                                          edge_symbol, n_edges, sigma, p, c, cur)
+            p = link[p]
+        if p == -1:
+            link[cur] = 0
+        else:
+            q = _sam_get(table, trans, sigma, p, c)
+            if maxlen[p] + 1 == maxlen[q]:
+                link[cur] = q
+            else:
+                clone = n_states
+                n_states += 1
+                maxlen[clone] = maxlen[p] + 1
+                link[clone] = link[q]
+                n_edges = _sam_copy_transitions(table, trans, head, edge_next,
+                                                edge_symbol, n_edges, sigma,
+                                                q, clone)
+                while p != -1 and _sam_get(table, trans, sigma, p, c) == q:
+                    _sam_set(table, trans, sigma, p, c, clone)
+                    p = link[p]
+                link[q] = clone
+                link[cur] = clone
+                # The shorter strings of q, possibly the match, moved to clone
+                if state == q and length <= maxlen[clone]:
+                    state = clone
+        last = cur
+    return lengths
+
+
+# Alphabets up to this size keep the suffix automaton transitions in a dense
+# table, as long as the table stays within _DENSE_MAX_CELLS entries
+_SMALL_ALPHABET = 64
+_DENSE_MAX_CELLS = 1 << 25
+
+
+@njit(cache=True)
+def _match_lengths(codes):
+    """
+    For each position i of the sequence, computes the length of the longest
+    substring starting at i that also appears in sequence[0:i].
+
+    A suffix automaton of sequence[0:i] is built online, one symbol at a time,
+    so it recognizes exactly the substrings of sequence[0:i]. The current match
+    is kept as a state of the automaton: it is extended by following
+    transitions and, when moving from i to i + 1, shortened by dropping its
+    first symbol, which is either the same state or its suffix link. Since a
+    match at i without its first symbol is also a match at i + 1, the matches
+    grow by at most n symbols overall and the whole computation is linear.
+
+    For small alphabets, the transitions of the automaton are kept in a dense
+    table; otherwise, they are kept in a dict.
+
+    Reference:
+        https://cp-algorithms.com/string/suffix-automaton.html
+
+    Args:
+        codes: the input sequence, encoded as integers.
+
+    Returns:
+        A numpy array with the longest match length at each position.
+    """
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    sigma = np.int64(codes.max()) + 1
+    if sigma <= _SMALL_ALPHABET and (2 * n + 1) * sigma <= _DENSE_MAX_CELLS:
+        table = np.full((2 * n + 1, sigma), -1, dtype=np.int32)
+        return _match_lengths_automaton(codes, sigma, table)
+    return _match_lengths_automaton(codes, sigma, None)
+
+
+@njit(cache=True)
+def _sum_lambdas(codes):
+    """
+    Computes the sum of Lambda_i over an integer-encoded sequence, where
+    Lambda_i is the length of the shortest substring starting at i that does
+    not appear in sequence[0:i], capped by the end of the sequence.
+    """
+    n = len(codes)
+    lengths = _match_lengths(codes)
+    lambdas = 0
+    for i in range(n):
+        lambdas += min(lengths[i] + 1, n - i)
+    return lambdas
+
+
+@njit(parallel=True, cache=True)
+def _sum_lambdas_batch(codes, offsets):
+    """
+    Computes _sum_lambdas for several sequences packed one after the other in
+    codes, where sequence b is codes[offsets[b]:offsets[b + 1]].
+    """
+    n_sequences = len(offsets) - 1
+    lambdas = np.zeros(n_sequences, dtype=np.int64)
+    for b in prange(n_sequences):
+        lambdas[b] = _sum_lambdas(codes[offsets[b]:offsets[b + 1]])
+    return lambdas
+
+
+def _entropy_kontoyiannis_codes(codes):
+    """
+    Kontoyiannis' estimator over an integer-encoded sequence. This is the
+    numerical worker behind entropy_kontoyiannis.
+    """
+    n = len(codes)
+    if n == 0:
+        return 0.0
+
+    lambdas = _sum_lambdas(codes)
+    return (1.0 * n / lambdas) * math.log2(n)
 
 
 def entropy_kontoyiannis(sequence):
@@ -88,31 +362,62 @@ def entropy_kontoyiannis(sequence):
     Returns:
         A float representing an estimate of the entropy rate of the sequence.
     """
-    n = len(sequence)
-    if n == 0:
-        return 0.0
-    
-    # For the pattern matching below, items in the sequence have to be strings
-    sequence = [str(item) for item in sequence]
+    return _entropy_kontoyiannis_codes(_encode(sequence))
 
-    lambdas = 0
-    for i in range(n):
-        current_sequence = ''.join(sequence[0:i])
-        match = True
-        k = i
-        while match and k < n:
-            k += 1
-            match = ''.join(sequence[i:k]) in current_sequence
-        lambdas += (k - i)
-    return (1.0 * n / lambdas) * np.log2(n)
+
+def entropy_kontoyiannis_batch(sequences):
+    """
+    Estimate the entropy rate of several sequences using Kontoyiannis'
+    algorithm. The sequences are processed in parallel when Numba is
+    available.
+
+    Args:
+        sequences: a list of input sequences of symbols.
+
+    Returns:
+        A numpy array with an estimate of the entropy rate of each sequence.
+    """
+    sizes = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(sizes)
+    # Each sequence keeps its own alphabet; the codes are packed back to back
+    codes = np.zeros(offsets[-1], dtype=np.int64)
+    for b, sequence in enumerate(sequences):
+        codes[offsets[b]:offsets[b + 1]] = _encode(sequence)
+
+    lambdas = _sum_lambdas_batch(codes, offsets)
+    entropies = np.zeros(len(sizes))
+    nonempty = sizes > 0
+    n = sizes[nonempty]
+    entropies[nonempty] = (1.0 * n / lambdas[nonempty]) * np.log2(n)
+    return entropies
+
+
+@njit(cache=True)
+def _longest_match_length(codes, i):
+    n = len(codes)
+
+    # Start positions in s[0:i] whose substring of the current length matches
+    # the one starting at i. Extending the match by one symbol only needs to
+    # compare one more symbol at each surviving position.
+    candidates = np.arange(i)
+    length = 0
+    while length < n - i:
+        candidates = candidates[candidates + length < i]
+        candidates = candidates[codes[candidates + length] == codes[i + length]]
+        if len(candidates) == 0:
+            break
+        length += 1
+    # Positions past the end of s have no substring at all
+    return max(min(length + 1, n - i), 0)
 
 
 def longest_match_length(s, i):
-    sequence = ''.join(s[0:i])
-    k = i
-    while k < len(s) and ''.join(s[i:k]) in sequence:
-        k += 1
-    return k - i
+    """
+    Computes the length of the shortest substring starting at position i of s
+    that does not appear in s[0:i], capped by the end of s.
+    """
+    return _longest_match_length(_encode(s), i)
 
 
 def entropy_kontoyiannis_longest_match(sequence):
@@ -138,14 +443,44 @@ def entropy_kontoyiannis_longest_match(sequence):
     if n == 0:
         return 0.0
 
-    # For the pattern matching below, items in the sequence have to be strings
-    sequence = [str(item) for item in sequence]
+    lengths = _match_lengths(_encode(sequence))
+    match_lengths = np.minimum(lengths + 1, n - np.arange(n))
+    lambdas = (match_lengths + 1).sum()
+    return (1.0 * n / lambdas) * math.log2(n)
 
-    lambdas = 0
-    for i in range(n):
-        match_length = longest_match_length(sequence, i)
-        lambdas += (match_length + 1)
-    return (1.0 * n / lambdas) * np.log2(n)
+
+# Sequences at least this long get their baseline entropy from the closed formula
+_BASELINE_MIN_SIZE = 100
+
+
+def _baseline_entropy_size(n, m):
+    """
+    Closed formula for the baseline entropy of a sequence of size n with m
+    unique symbols.
+    """
+    k = n - m + 1
+    baseline_routine_size = math.ceil((k * k) / 4 + k / 2)
+    baseline_novelty_size = m
+    return (n * math.log2(n)) / (baseline_routine_size + baseline_novelty_size)
+
+
+def _baseline_entropy_kontoyiannis_codes(codes, n_unique):
+    """
+    Baseline entropy of an integer-encoded sequence with n_unique symbols. This
+    is the numerical worker behind baseline_entropy_kontoyiannis.
+    """
+    n = len(codes)
+    if n == 0:
+        return 0.0
+
+    # The closed formula is already a good approximation for long sequences
+    if n >= _BASELINE_MIN_SIZE:
+        return _baseline_entropy_size(n, n_unique)
+
+    # The first symbol repeated as the routine, followed by every symbol once
+    routine = np.full(n - n_unique, codes[0], dtype=codes.dtype)
+    novelty = np.arange(n_unique, dtype=codes.dtype)
+    return _entropy_kontoyiannis_codes(np.concatenate((routine, novelty)))
 
 
 def baseline_entropy_kontoyiannis(sequence):
@@ -153,6 +488,9 @@ def baseline_entropy_kontoyiannis(sequence):
     Computes the baseline entropy of the input sequence by creating a baseline
     sequence and running Kontoyiannis et al.'s entropy estimator on it.
 
+    For sequences of size 100 or more, the estimate is given by the closed
+    formula in baseline_entropy instead, which closely approximates it.
+
     Reference: 
         https://epjdatascience.springeropen.com/articles/10.1140/epjds/s13688-021-00304-8
 
@@ -162,14 +500,9 @@ def baseline_entropy_kontoyiannis(sequence):
     Returns:
         A float indicating an estimate of the baseline entropy of the sequence.
     """
-    if not sequence:
-        return 0.0
-
-    n = len(sequence)
-    unique_symbols = set(sequence)
-    n_unique = len(unique_symbols)
-    baseline_sequence = [sequence[0]] * (n - n_unique) + list(unique_symbols)
-    return entropy_kontoyiannis(baseline_sequence)
+    codes = _encode(sequence)
+    n_unique = int(codes.max()) + 1 if len(codes) else 0
+    return _baseline_entropy_kontoyiannis_codes(codes, n_unique)
 
 
 def baseline_entropy(sequence):
@@ -194,11 +527,9 @@ def baseline_entropy(sequence):
         A float indicating an estimate of the baseline entropy of the sequence.
     """
     n = len(sequence)
-    m = len(set(sequence))
-    k = n - m + 1
-    baseline_routine_size = math.ceil((k * k) / 4 + k / 2)
-    baseline_novelty_size = m
-    return (n * np.log2(n)) / (baseline_routine_size + baseline_novelty_size)
+    if n == 0:
+        return 0.0
+    return _baseline_entropy_size(n, len(set(sequence)))
 
 
 # The three functions below are wrappers to the functions previously defined.
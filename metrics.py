@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from collections import defaultdict
+import itertools
+import operator
+
+import numpy as np
+
+from ._compat import divsufsort, njit
 
 
 def regularity(sequence):
@@ -51,54 +56,101 @@ def stationarity(sequence):
         Percentage of the sequence that is stationary.
     """
     n = len(sequence)
-    n_unique = len(set(sequence))
 
     if n <= 1:
         return 1.0
 
-    if n == n_unique:
-        return .0
-
-    stationary_transitions = 0
-    for i in range(1, n):
-        if sequence[i - 1] == sequence[i]:
-            stationary_transitions += 1
+    # A sequence of distinct symbols simply has no stationary transition, so
+    # there is no need to count the unique symbols up front
+    if isinstance(sequence, np.ndarray):
+        if sequence.dtype == object:
+            # Arbitrary objects are compared through their integer codes
+            codes = _encode(sequence)
+            same = codes[1:] == codes[:-1]
+        else:
+            same = sequence[1:] == sequence[:-1]
+            if same.ndim > 1:
+                # The symbols are the rows of the array
+                same = same.reshape(n - 1, -1).all(axis=1)
+        stationary_transitions = int(np.count_nonzero(same))
+    else:
+        stationary_transitions = sum(map(operator.eq, sequence,
+                                         itertools.islice(sequence, 1, None)))
 
     return stationary_transitions / (n - 1)
 
 
-def _suffix_array_manber_myers(s):
+def _encode(sequence):
     """
-    Compute the suffix array of a string using the Manber-Meyers algorithm.
-
-    Reference: http://algorithmicalley.com/archive/2013/06/30/suffix-arrays.aspx
+    Map the symbols of a sequence to integer codes.
 
     Parameters
     ----------
-    s : string
-        The input string.
+    sequence : list
+        A list of symbols.
 
     Returns
     -------
-    list
-        The suffix array of the input string.
+    numpy.ndarray
+        The code of each symbol, in [0, n_unique), stored in the narrowest
+        unsigned integer type that fits the alphabet.
     """
-    def sort_bucket(s, bucket, order):
-        d = defaultdict(list)
-        for i in bucket:
-            key = ''.join(s[i + order // 2:i + order])
-            d[key].append(i)
-        result = []
-        for k, v in sorted(d.items()):
-            if len(v) > 1:
-                result += sort_bucket(s, v, 2 * order)
-            else:
-                result.append(v[0])
-        return result
-
-    return sort_bucket(s, range(len(s)), 1)
+    try:
+        symbols = np.asarray(sequence)
+        if symbols.dtype == object:
+            raise TypeError("symbols cannot be compared as an array")
+        unique, codes = np.unique(symbols, return_inverse=True, axis=0)
+    except (TypeError, ValueError):
+        # Symbols that NumPy cannot sort, such as None or tuples of different
+        # sizes, are compared by their string representation
+        unique, codes = np.unique([str(item) for item in sequence],
+                                  return_inverse=True)
+    dtype = np.min_scalar_type(max(len(unique) - 1, 0))
+    return codes.reshape(-1).astype(dtype)
+
+
+def _suffix_array(codes):
+    """
+    Compute the suffix array of an integer-encoded sequence.
 
+    The suffix array is built in linear time by pydivsufsort when it is
+    installed. Otherwise, it is built by prefix doubling: at each round,
+    suffixes are sorted by the ranks of their first k symbols and of the k
+    symbols that follow, so the ranks of their first 2k symbols are obtained
+    with a single vectorized sort.
 
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        The input sequence, encoded as non-negative integers.
+
+    Returns
+    -------
+    numpy.ndarray
+        The suffix array of the input sequence.
+    """
+    if divsufsort is not None:
+        return divsufsort(np.ascontiguousarray(codes)).astype(np.int64)
+
+    n = len(codes)
+    rank = np.asarray(codes, dtype=np.int64)
+    sa = np.argsort(rank, kind='stable')
+    k = 1
+    while k < n:
+        # Suffixes shorter than 2k symbols sort before their extensions
+        second = np.full(n, -1, dtype=np.int64)
+        second[:n - k] = rank[k:]
+        sa = np.lexsort((second, rank))
+        changed = (np.diff(rank[sa]) != 0) | (np.diff(second[sa]) != 0)
+        rank = np.empty(n, dtype=np.int64)
+        rank[sa] = np.concatenate(([0], np.cumsum(changed)))
+        if rank[sa[-1]] == n - 1:
+            break
+        k *= 2
+    return sa
+
+
+@njit(cache=True)
 def _kasai(s, sa):
     """
     Computes the logest common prefix (LCP) array of a string given its suffix 
@@ -110,20 +162,20 @@ def _kasai(s, sa):
 
     Parameters
     ----------
-    s : string
-        The input string.
-    sa : list
-        The suffix array of the input string.
+    s : numpy.ndarray
+        The input sequence, encoded as integers.
+    sa : numpy.ndarray
+        The suffix array of the input sequence.
 
     Returns
     -------
-    list
-        The LCP array of the input string.
+    numpy.ndarray
+        The LCP array of the input sequence.
     """
     n = len(s)
     k = 0
-    lcp = [0] * n
-    rank = [0] * n
+    lcp = np.zeros(n, dtype=np.int64)
+    rank = np.zeros(n, dtype=np.int64)
     for i in range(n):
         rank[sa[i]] = i
     for i in range(n):
@@ -160,18 +212,22 @@ def diversity(sequence):
         substrings in the sequence
     """
     n = len(sequence)
-    n_unique = len(set(sequence))
 
     if n <= 1:
         return 0.0
 
+    # The number of unique symbols comes from the same encoding used to build
+    # the suffix array
+    codes = _encode(sequence)
+    n_unique = int(codes.max()) + 1
+
     if n == n_unique:
         return .0
 
     total_substrs = (n * (n + 1)) // 2
 
-    suffix_array = _suffix_array_manber_myers(sequence)
-    lcp = _kasai(sequence, suffix_array)
-    distinct_substrs = total_substrs - sum(lcp)
+    suffix_array = _suffix_array(codes)
+    lcp = _kasai(codes, suffix_array)
+    distinct_substrs = total_substrs - int(lcp.sum())
 
     return distinct_substrs / total_substrs
@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 
 import math
-import numpy as np
 
-from .entropy import entropy_kontoyiannis, baseline_entropy_kontoyiannis
+from .entropy import (_encode, _entropy_kontoyiannis_codes,
+                      _baseline_entropy_kontoyiannis_codes)
 
 
 def max_predictability(S, N):
@@ -29,24 +29,49 @@ def max_predictability(S, N):
     """
     if S == 0.0 or N <= 1:
         return 1.0
-    for p in np.arange(0.0001, 1.0000, 0.0001):
+
+    log2_n = math.log2(N - 1)
+
+    def f(p):
         h = -p * math.log2(p) - (1 - p) * math.log2(1 - p)
-        pi_max = h + (1 - p) * math.log2(N - 1) - S
-        if abs(pi_max) <= 0.001:
-            return round(p, 3)
-    return 0.0
+        return h + (1 - p) * log2_n - S
+
+    # f increases on (0, 1/N], where it peaks at log2(N) - S, and decreases on
+    # [1/N, 1), so each branch has at most one root and we can bisect it.
+    lo, hi = 0.0001, 0.9999
+    peak = 1.0 / N
+    if f(lo) < 0:
+        # Allow for rounding error when S is exactly log2(N)
+        if f(peak) < -1e-9:
+            # S is larger than the entropy of any distribution over N symbols
+            return 0.0
+        hi, increasing = peak, True
+    else:
+        if f(hi) > 0:
+            return round(hi, 3)
+        lo, increasing = max(lo, peak), False
+
+    while hi - lo > 1e-6:
+        p = (lo + hi) / 2
+        if (f(p) < 0) == increasing:
+            lo = p
+        else:
+            hi = p
+    return round((lo + hi) / 2, 3)
 
 
 def predictability_gap(sequence):
     if not sequence:
         return 0.0
 
-    n_unique = len(set(sequence))
+    # Both estimators run on the same encoding of the sequence
+    codes = _encode(sequence)
+    n_unique = int(codes.max()) + 1
 
-    original_entropy = entropy_kontoyiannis(sequence)
+    original_entropy = _entropy_kontoyiannis_codes(codes)
     original_predictability = max_predictability(original_entropy, n_unique)
 
-    baseline_entropy = baseline_entropy_kontoyiannis(sequence)
+    baseline_entropy = _baseline_entropy_kontoyiannis_codes(codes, n_unique)
     baseline_predictability = max_predictability(baseline_entropy, n_unique)
 
     return original_predictability - baseline_predictability
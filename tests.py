@@ -1,5 +1,7 @@
 import random
 
+import numpy as np
+
 
 def test_regularity():
     from .metrics import regularity
@@ -25,6 +27,11 @@ def test_stationarity():
     assert stationarity([1, 2, 1, 2]) == .0
     assert stationarity([1, 2, 3, 1]) == .0
     assert stationarity([1, 2, 1]) == .0
+    assert stationarity([(1, 2), (1, 3), (1, 3)]) == 0.5
+    assert stationarity(np.array([(1, 2), (1, 3), (1, 3)])) == 0.5
+    assert round(stationarity(np.array([1, 1, 2, 1])), 2) == 0.33
+    assert stationarity(np.array([None, None, "a"], dtype=object)) == 0.5
+    assert stationarity([1, "1", 2]) == .0
 
 
 def test_diversity():
@@ -36,6 +43,30 @@ def test_diversity():
     assert round(diversity(["HW", "P", "HW", "S", "HW", "B"]), 2) == 0.90
 
 
+def test_suffix_array_fallback():
+    from . import metrics
+    from .metrics import _encode, _suffix_array, diversity
+
+    divsufsort = metrics.divsufsort
+    metrics.divsufsort = None
+    try:
+        nr_tests = 100
+        for _ in range(nr_tests):
+            size = random.randint(1, 200)
+            X = [str(random.randint(0, random.choice([1, 10]))) for _ in range(size)]
+            codes = _encode(X)
+            suffix_array = list(_suffix_array(codes))
+            assert suffix_array == sorted(range(size), key=lambda i: list(codes[i:]))
+            if divsufsort is not None:
+                assert suffix_array == list(divsufsort(codes))
+
+        assert diversity(["H", "H", "H"]) == 0.5
+        assert diversity(["HW", "HW", "HW"]) == 0.5
+        assert round(diversity(["HW", "P", "HW", "S", "HW", "B"]), 2) == 0.90
+    finally:
+        metrics.divsufsort = divsufsort
+
+
 def test_shannon_entropy():
     from .entropy import uniform_entropy, shannon_entropy
 
@@ -48,6 +79,27 @@ def test_shannon_entropy():
         assert round(shannon_ent, 3) <= round(uniform_ent, 3)
 
 
+def test_joint_entropy():
+    from .entropy import shannon_entropy, joint_entropy, conditional_entropy
+
+    assert joint_entropy([], []) == 0.0
+    assert joint_entropy(["H", "W"], ["H", "W"]) == 1.0
+    assert joint_entropy(["H", "H", "W", "W"], ["A", "B", "A", "B"]) == 2.0
+    assert conditional_entropy(["H", "H", "W", "W"], ["A", "A", "B", "B"]) == 0.0
+
+    nr_tests = 100
+    sequence_size = 500
+    for _ in range(nr_tests):
+        X = [str(random.randint(0, 10)) for _ in range(sequence_size)]
+        Y = [str(random.randint(0, 10)) for _ in range(sequence_size)]
+        x_ent = shannon_entropy(X)
+        y_ent = shannon_entropy(Y)
+        joint_ent = joint_entropy(X, Y)
+        assert round(max(x_ent, y_ent), 3) <= round(joint_ent, 3)
+        assert round(joint_ent, 3) <= round(x_ent + y_ent, 3)
+        assert round(conditional_entropy(X, Y), 3) == round(joint_ent - y_ent, 3)
+
+
 def test_real_entropy():
     from .entropy import shannon_entropy, entropy_kontoyiannis
 
@@ -60,6 +112,89 @@ def test_real_entropy():
         assert round(song_ent, 3) <= round(shannon_ent, 3)
 
 
+def test_real_entropy_unorderable_symbols():
+    from .entropy import entropy_kontoyiannis, baseline_entropy_kontoyiannis
+
+    assert round(entropy_kontoyiannis([None, "a", None, "a"]), 3) == 1.6
+    assert round(entropy_kontoyiannis([(1, 2), (1,), (1, 2)]), 3) == 1.585
+    assert round(baseline_entropy_kontoyiannis([None, "a", None, "a"]), 3) == 1.333
+
+
+def _brute_force_match_length(X, i):
+    # Length of the longest substring starting at i that also appears in X[0:i]
+    length = 0
+    while i + length < len(X):
+        pattern = X[i:i + length + 1]
+        if not any(X[j:j + len(pattern)] == pattern
+                   for j in range(i - len(pattern) + 1)):
+            break
+        length += 1
+    return length
+
+
+def test_match_lengths():
+    import math
+    from .entropy import _match_lengths, entropy_kontoyiannis
+    from .metrics import _encode
+
+    nr_tests = 100
+    for _ in range(nr_tests):
+        size = random.randint(1, 120)
+        X = [str(random.randint(0, random.choice([1, 3, 10]))) for _ in range(size)]
+        if random.random() < 0.5:
+            period = X[:random.randint(1, 6)]
+            X = (period * size)[:size]
+        lengths = [_brute_force_match_length(X, i) for i in range(size)]
+        assert list(_match_lengths(_encode(X))) == lengths
+        lambdas = sum(min(lengths[i] + 1, size - i) for i in range(size))
+        assert entropy_kontoyiannis(X) == (1.0 * size / lambdas) * math.log2(size)
+
+
+def test_match_lengths_dense_sparse():
+    from .entropy import _match_lengths_automaton
+
+    nr_tests = 100
+    for _ in range(nr_tests):
+        size = random.randint(1, 500)
+        sigma = random.choice([2, 10, 64, 65, 300])
+        codes = np.random.randint(0, sigma, size)
+        if random.random() < 0.5:
+            codes = np.resize(codes[:random.randint(1, 6)], size)
+        table = np.full((2 * size + 1, sigma), -1, dtype=np.int32)
+        dense = _match_lengths_automaton(codes, sigma, table)
+        sparse = _match_lengths_automaton(codes, sigma, None)
+        assert np.array_equal(dense, sparse)
+
+
+def test_real_entropy_batch():
+    from .entropy import entropy_kontoyiannis, entropy_kontoyiannis_batch
+
+    nr_tests = 100
+    sequences = [[str(random.randint(0, 10)) for _ in range(random.randint(0, 500))]
+                 for _ in range(nr_tests)]
+    batch_ents = entropy_kontoyiannis_batch(sequences)
+    assert len(batch_ents) == nr_tests
+    for X, batch_ent in zip(sequences, batch_ents):
+        assert round(batch_ent, 6) == round(entropy_kontoyiannis(X), 6)
+
+
+def test_max_predictability():
+    import math
+    from .pred_lims import max_predictability
+
+    assert max_predictability(0.0, 5) == 1.0
+    assert max_predictability(1.0, 1) == 1.0
+    assert max_predictability(1.0, 10) == 0.865
+    assert max_predictability(1.0, 10.0) == 0.865
+    assert max_predictability(2.0, 10) == 0.661
+    assert max_predictability(1.0, 2) == 0.5
+    assert max_predictability(math.log2(20), 20) == 0.05
+    # Entropy larger than log2(N): no solution
+    assert max_predictability(4.0, 10) == 0.0
+    # The solution lies beyond the largest p searched
+    assert max_predictability(0.0001, 10) == 1.0
+
+
 def test_context():
     from .context import sequence_merging, sequence_splitting
     from .entropy import entropy_kontoyiannis